@@ -13,6 +13,7 @@
 # limitations under the License.
 # Modified from librosa(https://github.com/librosa/librosa)
 import warnings
+from functools import lru_cache
 from typing import List
 from typing import Optional
 from typing import Union
@@ -325,6 +326,24 @@ def compute_fbank_matrix(sr: int,
     return weights
 
 
+@lru_cache(maxsize=16)
+def _cached_fbank_matrix(sr: int,
+                         n_fft: int,
+                         n_mels: int,
+                         fmin: float,
+                         fmax: float) -> np.ndarray:
+    """Compute fbank matrix once for the same args, it is reused by every melspectrogram call.
+
+    Returns:
+        np.ndarray: Read-only mel transform matrix with shape `(n_mels, n_fft//2 + 1)`.
+    """
+    fb_matrix = compute_fbank_matrix(
+        sr=sr, n_fft=n_fft, n_mels=n_mels, fmin=fmin, fmax=fmax)
+    # The cached matrix is shared by all the callers
+    fb_matrix.flags.writeable = False
+    return fb_matrix
+
+
 def stft(x: np.ndarray,
          n_fft: int=2048,
          hop_length: Optional[int]=None,
@@ -539,7 +558,7 @@ def melspectrogram(x: np.ndarray,
         pad_mode=pad_mode)
 
     spect_power = np.abs(s)**power
-    fb_matrix = compute_fbank_matrix(
+    fb_matrix = _cached_fbank_matrix(
         sr=sr, n_fft=window_size, n_mels=n_mels, fmin=fmin, fmax=fmax)
     mel_spect = np.matmul(fb_matrix, spect_power)
     if to_db:
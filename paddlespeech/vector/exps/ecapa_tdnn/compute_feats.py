@@ -0,0 +1,122 @@
+# Copyright (c) 2022 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import argparse
+import os
+from multiprocessing import Pool
+
+import h5py
+import numpy as np
+from yacs.config import CfgNode
+
+from paddlespeech.s2t.utils.log import Log
+from paddlespeech.vector.io.dataset import CSVDataset
+
+logger = Log(__name__).getlog()
+
+# the dataset and feat dtype in each pool worker process,
+# they are set by the pool initializer and the dataset is not pickled for each task
+_dataset = None
+_dtype = None
+
+
+def _init_worker(dataset, dtype):
+    global _dataset, _dtype
+    _dataset = dataset
+    _dtype = np.dtype(dtype)
+
+
+def _compute_feat(idx):
+    record = _dataset[idx]
+    return record['utt_id'], record['feat'].astype(_dtype)
+
+
+def compute_dataset_feats(dataset, feat_path, num_workers, dtype="float16"):
+    """Compute the dataset melspectrogram feats with multiprocess 
+       and store them in the hdf5 file keyed by the utt_id
+
+    Args:
+        dataset (CSVDataset): the dataset with melspectrogram feat_type
+        feat_path (str): the hdf5 file path to store the feats
+        num_workers (int): the process num to compute the feats
+        dtype (str, optional): the stored feats data type, the log melspectrogram is 
+                               well kept in float16 and it halves the feats size. 
+                               Defaults to "float16".
+    """
+    logger.info(f'Computing feats on {dataset.csv_path} dataset')
+    with Pool(
+            num_workers, initializer=_init_worker,
+            initargs=(dataset, dtype)) as pool:
+        with h5py.File(feat_path, 'w') as feat_file:
+            for utt_id, feat in pool.imap(
+                    _compute_feat, range(len(dataset)), chunksize=64):
+                feat_file.create_dataset(utt_id, data=feat)
+    logger.info(f'Feats of {len(dataset)} utterances are saved to {feat_path}')
+
+
+def main(args, config):
+    """The main process for computing the train and dev dataset feats
+
+    Args:
+        args (argparse.Namespace): the command line args namespace
+        config (yacs.config.CfgNode): the yaml config
+    """
+    os.makedirs(args.feat_dir, exist_ok=True)
+    # the feature args align with the train.py feature extractor
+    for split in ["train", "dev"]:
+        dataset = CSVDataset(
+            csv_path=os.path.join(args.data_dir, f"vox/csv/{split}.csv"),
+            feat_type="melspectrogram",
+            n_mels=config.n_mels,
+            window_size=config.window_size,
+            hop_length=config.hop_size)
+        compute_dataset_feats(dataset,
+                              os.path.join(args.feat_dir, f"{split}.h5"),
+                              args.num_workers, args.dtype)
+
+
+if __name__ == "__main__":
+    # yapf: disable
+    parser = argparse.ArgumentParser(__doc__)
+    parser.add_argument("--config",
+                        default=None,
+                        type=str,
+                        help="configuration file")
+    parser.add_argument("--data-dir",
+                        default="./data/",
+                        type=str,
+                        help="data directory")
+    parser.add_argument("--feat-dir",
+                        default="./data/vox/feats",
+                        type=str,
+                        help="Directory to save the precomputed train.h5 and dev.h5 feats.")
+    parser.add_argument("--num-workers",
+                        default=os.cpu_count(),
+                        type=int,
+                        help="Number of process to compute the feats.")
+    parser.add_argument("--dtype",
+                        choices=["float16", "float32"],
+                        default="float16",
+                        help="Data type of the stored feats, the float16 feats halve the bandwidth.")
+    args = parser.parse_args()
+    # yapf: enable
+
+    # https://yaml.org/type/float.html
+    config = CfgNode(new_allowed=True)
+    if args.config:
+        config.merge_from_file(args.config)
+
+    config.freeze()
+    print(config)
+
+    main(args, config)
@@ -24,6 +24,7 @@ from paddlespeech.s2t.utils.log import Log
 from paddlespeech.vector.io.batch import feature_normalize
 from paddlespeech.vector.models.ecapa_tdnn import EcapaTdnn
 from paddlespeech.vector.modules.sid_model import SpeakerIdetification
+from paddlespeech.vector.training.checkpoint import load_model_state_dict
 from paddlespeech.vector.training.seeding import seed_everything
 
 logger = Log(__name__).getlog()
@@ -46,8 +47,7 @@ def extract_audio_embedding(args, config):
         os.path.expanduser(args.load_checkpoint))
 
     # load model checkpoint to sid model
-    state_dict = paddle.load(
-        os.path.join(args.load_checkpoint, 'model.pdparams'))
+    state_dict = load_model_state_dict(args.load_checkpoint)
     model.set_state_dict(state_dict)
     logger.info(f'Checkpoint loaded from {args.load_checkpoint}')
 
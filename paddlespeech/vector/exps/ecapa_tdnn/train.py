@@ -14,28 +14,33 @@
 import argparse
 import os
 import time
+from functools import partial
 
-import numpy as np
 import paddle
 from paddle.io import BatchSampler
 from paddle.io import DataLoader
 from paddle.io import DistributedBatchSampler
-from paddleaudio.compliance.librosa import melspectrogram
+from paddleaudio.features import LogMelSpectrogram
 from yacs.config import CfgNode
 
 from paddlespeech.s2t.utils.log import Log
 from paddlespeech.vector.io.augment import build_augment_pipeline
 from paddlespeech.vector.io.augment import waveform_augment
-from paddlespeech.vector.io.batch import batch_pad_right
+from paddlespeech.vector.io.batch import feat_collate_fn
 from paddlespeech.vector.io.batch import feature_normalize
 from paddlespeech.vector.io.batch import waveform_collate_fn
 from paddlespeech.vector.io.dataset import CSVDataset
+from paddlespeech.vector.io.dataset import MelFeatDataset
 from paddlespeech.vector.models.ecapa_tdnn import EcapaTdnn
 from paddlespeech.vector.modules.loss import AdditiveAngularMargin
 from paddlespeech.vector.modules.loss import LogSoftmaxWrapper
 from paddlespeech.vector.modules.sid_model import SpeakerIdetification
+from paddlespeech.vector.training.checkpoint import AsyncCheckpointSaver
+from paddlespeech.vector.training.checkpoint import load_model_state_dict
+from paddlespeech.vector.training.checkpoint import save_packed_state_dict
 from paddlespeech.vector.training.scheduler import CyclicLRScheduler
 from paddlespeech.vector.training.seeding import seed_everything
+from paddlespeech.vector.training.seeding import worker_init_fn
 from paddlespeech.vector.utils.time import Timer
 
 logger = Log(__name__).getlog()
@@ -60,12 +65,32 @@ def main(args, config):
 
     # stage2: data prepare, such vox1 and vox2 data, and augment noise data and pipline
     # note: some operations must be done in rank==0
-    train_dataset = CSVDataset(
-        csv_path=os.path.join(args.data_dir, "vox/csv/train.csv"),
-        label2id_path=os.path.join(args.data_dir, "vox/meta/label2id.txt"))
-    dev_dataset = CSVDataset(
-        csv_path=os.path.join(args.data_dir, "vox/csv/dev.csv"),
-        label2id_path=os.path.join(args.data_dir, "vox/meta/label2id.txt"))
+    #       the precomputed feats can not be augmented on the audio sample point,
+    #       so we only use them when the augment is disabled
+    use_feat_cache = args.feat_dir is not None and not config.augment
+    if args.feat_dir and config.augment:
+        logger.warning(
+            "The precomputed feats can not be augmented, we ignore the --feat-dir"
+        )
+
+    if use_feat_cache:
+        train_dataset = MelFeatDataset(
+            csv_path=os.path.join(args.data_dir, "vox/csv/train.csv"),
+            feat_path=os.path.join(args.feat_dir, "train.h5"),
+            label2id_path=os.path.join(args.data_dir, "vox/meta/label2id.txt"))
+        dev_dataset = MelFeatDataset(
+            csv_path=os.path.join(args.data_dir, "vox/csv/dev.csv"),
+            feat_path=os.path.join(args.feat_dir, "dev.h5"),
+            label2id_path=os.path.join(args.data_dir, "vox/meta/label2id.txt"))
+        collate_fn = feat_collate_fn
+    else:
+        train_dataset = CSVDataset(
+            csv_path=os.path.join(args.data_dir, "vox/csv/train.csv"),
+            label2id_path=os.path.join(args.data_dir, "vox/meta/label2id.txt"))
+        dev_dataset = CSVDataset(
+            csv_path=os.path.join(args.data_dir, "vox/csv/dev.csv"),
+            label2id_path=os.path.join(args.data_dir, "vox/meta/label2id.txt"))
+        collate_fn = waveform_collate_fn
 
     # we will build the augment pipeline process list
     if config.augment:
@@ -95,6 +120,28 @@ def main(args, config):
     criterion = LogSoftmaxWrapper(
         loss_fn=AdditiveAngularMargin(margin=config.margin, scale=config.scale))
 
+    # stage6-1: build the feature extractor, which computes the batch log melspectrogram
+    #           on the training device instead of the per-utterance numpy melspectrogram
+    #           the args align with the paddleaudio.compliance.librosa.melspectrogram
+    feature_extractor = LogMelSpectrogram(
+        sr=config.sr,
+        n_fft=config.window_size,
+        hop_length=config.hop_size,
+        win_length=config.window_size,
+        n_mels=config.n_mels)
+    # we only do the mean norm on the batch feats, (N, n_mels, T)
+    normalize = partial(feature_normalize, mean_norm=True, std_norm=False)
+
+    # stage6-2: build the grad scaler for the mixed precision training
+    #           the AdditiveAngularMargin loss is always computed in float32
+    use_amp = config.get("use_amp", False) and args.device == "gpu"
+    amp_level = config.get("amp_level", "O1")
+    if use_amp:
+        scaler = paddle.amp.GradScaler(
+            init_loss_scaling=config.get("scale_loss", 1024.0))
+    else:
+        scaler = None
+
     # stage7: confirm training start epoch
     #         if pre-trained model exists, start epoch confirmed by the pre-trained model
     start_epoch = 0
@@ -103,9 +150,8 @@ def main(args, config):
         args.load_checkpoint = os.path.abspath(
             os.path.expanduser(args.load_checkpoint))
         try:
-            # load model checkpoint
-            state_dict = paddle.load(
-                os.path.join(args.load_checkpoint, 'model.pdparams'))
+            # load model checkpoint, it may be the packed model.pdpacked or the model.pdparams
+            state_dict = load_model_state_dict(args.load_checkpoint)
             model.set_state_dict(state_dict)
 
             # load optimizer checkpoint
@@ -124,33 +170,96 @@ def main(args, config):
         except ValueError:
             pass
 
+    # stage7-1: cast the model to float16 in the O2 mixed precision training,
+    #           it is done after the float32 checkpoint is loaded,
+    #           and the state dict is still saved in float32 for the test and the resuming
+    if use_amp and amp_level == 'O2':
+        model, optimizer = paddle.amp.decorate(
+            models=model,
+            optimizers=optimizer,
+            level=amp_level,
+            save_dtype='float32')
+
     # stage8: we build the batch sampler for paddle.DataLoader
+    #         the utterance segments have the same chunk duration,
+    #         we drop the last ragged batch so that all the batches have the same shape,
+    #         and the cudnn exhaustive search algo is cached for the fixed shape
     train_sampler = DistributedBatchSampler(
         train_dataset,
         batch_size=config.batch_size,
         shuffle=True,
-        drop_last=False)
+        drop_last=True)
+    if args.device == "gpu":
+        paddle.set_flags({'FLAGS_cudnn_exhaustive_search': True})
     train_loader = DataLoader(
         train_dataset,
         batch_sampler=train_sampler,
         num_workers=config.num_workers,
-        collate_fn=waveform_collate_fn,
+        collate_fn=collate_fn,
         return_list=True,
-        use_buffer_reader=True, )
+        use_buffer_reader=True,
+        use_shared_memory=True,
+        prefetch_factor=config.get("prefetch_factor", 4),
+        persistent_workers=config.num_workers > 0,
+        worker_init_fn=worker_init_fn, )
+
+    # stage8-1: construct the valid dataset dataloader only once on 0-rank,
+    #           the evaluation is only done on 0-rank and the workers are kept in all the epochs
+    if rank == 0:
+        dev_sampler = BatchSampler(
+            dev_dataset,
+            batch_size=config.batch_size,
+            shuffle=False,
+            drop_last=False)
+        dev_loader = DataLoader(
+            dev_dataset,
+            batch_sampler=dev_sampler,
+            collate_fn=collate_fn,
+            num_workers=config.num_workers,
+            return_list=True,
+            persistent_workers=config.num_workers > 0, )
+
+    # stage8-2: convert the model forward to the static graph, which removes the per-op python dispatch cost,
+    #           the loss backward and the optimizer step are still done in the dynamic graph
+    #           the feats time dimension is variable in the input spec
+    if config.get("to_static", False):
+        model = paddle.jit.to_static(
+            model,
+            input_spec=[
+                paddle.static.InputSpec(
+                    shape=[None, config.n_mels, None], dtype='float32')
+            ])
 
     # stage9: start to train
     #         we will comment the training process
     steps_per_epoch = len(train_sampler)
     timer = Timer(steps_per_epoch * config.epochs)
     last_saved_epoch = ""
+    # the checkpoint is saved in the background thread on 0-rank
+    #   the packed model checkpoint stores all the parameters in one contiguous buffer
+    checkpoint_saver = AsyncCheckpointSaver()
+    if config.get("packed_checkpoint", False):
+        model_file, save_model_fn = "model.pdpacked", save_packed_state_dict
+    else:
+        model_file, save_model_fn = "model.pdparams", paddle.save
+    # the learning rate type is fixed in the training, so we confirm the lr step once
+    if isinstance(optimizer._learning_rate, paddle.optimizer.lr.LRScheduler):
+        lr_step = optimizer._learning_rate.step
+    else:
+
+        def lr_step():
+            pass
+
     timer.start()
 
     for epoch in range(start_epoch + 1, config.epochs + 1):
         # at the beginning, model must set to train mode
         model.train()
 
-        avg_loss = 0
-        num_corrects = 0
+        # the loss and corrects are accumulated on the device,
+        # and we only sync them to the host when we print the log
+        avg_loss = paddle.zeros([1])
+        num_corrects = paddle.zeros([1], dtype='int64')
         num_samples = 0
         train_reader_cost = 0.0
         train_feat_cost = 0.0
@@ -161,59 +270,62 @@ def main(args, config):
             train_reader_cost += time.time() - reader_start
 
             # stage 9-1: batch data is audio sample points and speaker id label
+            #            the waveforms in a batch have the same length by waveform_collate_fn,
+            #            and they are already prefetched to the device by the buffered reader
+            #            if we use the precomputed feats, batch data is the feats and speaker id label
             feat_start = time.time()
-            waveforms, labels = batch['waveforms'], batch['labels']
-            waveforms, lengths = batch_pad_right(waveforms.numpy())
-            waveforms = paddle.to_tensor(waveforms)
-
-            # stage 9-2: audio sample augment method, which is done on the audio sample point
-            #            the original wavefrom and the augmented waveform is concatented in a batch
-            #            eg. five augment method in the augment pipeline
-            #                the final data nums is batch_size * [five + one] 
-            #                -> five augmented waveform batch plus one original batch waveform
-            if len(augment_pipeline) != 0:
-                waveforms = waveform_augment(waveforms, augment_pipeline)
-                labels = paddle.concat(
-                    [labels for i in range(len(augment_pipeline) + 1)])
-
-            # stage 9-3: extract the audio feats,such fbank, mfcc, spectrogram
-            feats = []
-            for waveform in waveforms.numpy():
-                feat = melspectrogram(
-                    x=waveform,
-                    sr=config.sr,
-                    n_mels=config.n_mels,
-                    window_size=config.window_size,
-                    hop_length=config.hop_size)
-                feats.append(feat)
-            feats = paddle.to_tensor(np.asarray(feats))
+            #            the precomputed feats may be stored in float16, we cast it on the device
+            if use_feat_cache:
+                feats, labels = batch['feats'], batch['labels']
+                feats = feats.astype('float32')
+            else:
+                waveforms, labels = batch['waveforms'], batch['labels']
+
+                # stage 9-2: audio sample augment method, which is done on the audio sample point
+                #            the original wavefrom and the augmented waveform is concatented in a batch
+                #            eg. five augment method in the augment pipeline
+                #                the final data nums is batch_size * [five + one] 
+                #                -> five augmented waveform batch plus one original batch waveform
+                if len(augment_pipeline) != 0:
+                    waveforms = waveform_augment(waveforms, augment_pipeline)
+                    labels = paddle.concat(
+                        [labels for i in range(len(augment_pipeline) + 1)])
+
+                # stage 9-3: extract the audio feats,such fbank, mfcc, spectrogram
+                feats = feature_extractor(waveforms)
 
             # stage 9-4: feature normalize, which help converge and imporve the performance
-            feats = feature_normalize(
-                feats, mean_norm=True, std_norm=False)  # Features normalization
+            feats = normalize(feats)  # Features normalization
             train_feat_cost += time.time() - feat_start
 
             # stage 9-5: model forward, such ecapa-tdnn, x-vector
             train_start = time.time()
-            logits = model(feats)
+            with paddle.amp.auto_cast(enable=use_amp, level=amp_level):
+                logits = model(feats)
 
-            # stage 9-6: loss function criterion, such AngularMargin, AdditiveAngularMargin
-            loss = criterion(logits, labels)
+                # stage 9-6: loss function criterion, such AngularMargin, AdditiveAngularMargin
+                loss = criterion(logits, labels)
 
             # stage 9-7: update the gradient and clear the gradient cache
-            loss.backward()
-            optimizer.step()
-            if isinstance(optimizer._learning_rate,
-                          paddle.optimizer.lr.LRScheduler):
-                optimizer._learning_rate.step()
-            optimizer.clear_grad()
+            if scaler:
+                scaled_loss = scaler.scale(loss)
+                scaled_loss.backward()
+                scaler.minimize(optimizer, scaled_loss)
+            else:
+                loss.backward()
+                optimizer.step()
+            lr_step()
+            # release the gradients instead of the memset to zero,
+            # they are created again in the next backward
+            optimizer.clear_grad(set_to_zero=False)
 
             # stage 9-8: Calculate average loss per batch
-            avg_loss = loss.item()
+            avg_loss += loss.detach()
 
             # stage 9-9: Calculate metrics, which is one-best accuracy
-            preds = paddle.argmax(logits, axis=1)
-            num_corrects += (preds == labels).numpy().sum()
+            #            the int32 corrects vector is summed into the int64 accumulator
+            corrects = paddle.equal(logits.argmax(axis=1), labels)
+            num_corrects += corrects.astype('int32').sum(dtype='int64')
             num_samples += feats.shape[0]
             train_run_cost += time.time() - train_start
             timer.count()  # step plus one in timer
@@ -221,8 +333,8 @@ def main(args, config):
             # stage 9-10: print the log information only on 0-rank per log-freq batchs
             if (batch_idx + 1) % config.log_interval == 0 and rank == 0:
                 lr = optimizer.get_lr()
-                avg_loss /= config.log_interval
-                avg_acc = num_corrects / num_samples
+                avg_loss = avg_loss.item() / config.log_interval
+                avg_acc = num_corrects.item() / num_samples
 
                 print_msg = 'Train Epoch={}/{}, Step={}/{}'.format(
                     epoch, config.epochs, batch_idx + 1, steps_per_epoch)
@@ -239,8 +351,8 @@ def main(args, config):
                     lr, timer.timing, timer.ips, timer.eta)
                 logger.info(print_msg)
 
-                avg_loss = 0
-                num_corrects = 0
+                avg_loss = paddle.zeros([1])
+                num_corrects = paddle.zeros([1], dtype='int64')
                 num_samples = 0
                 train_reader_cost = 0.0
                 train_feat_cost = 0.0
@@ -255,76 +367,66 @@ def main(args, config):
                 )  # Wait for valid step in main process
                 continue  # Resume trainning on other process
 
-            # stage 9-12: construct the valid dataset dataloader
-            dev_sampler = BatchSampler(
-                dev_dataset,
-                batch_size=config.batch_size,
-                shuffle=False,
-                drop_last=False)
-            dev_loader = DataLoader(
-                dev_dataset,
-                batch_sampler=dev_sampler,
-                collate_fn=waveform_collate_fn,
-                num_workers=config.num_workers,
-                return_list=True, )
-
-            # set the model to eval mode
+            # stage 9-12: set the model to eval mode
             model.eval()
-            num_corrects = 0
+            num_corrects = paddle.zeros([1], dtype='int64')
             num_samples = 0
 
             # stage 9-13: evaluation the valid dataset batch data
             logger.info('Evaluate on validation dataset')
             with paddle.no_grad():
                 for batch_idx, batch in enumerate(dev_loader):
-                    waveforms, labels = batch['waveforms'], batch['labels']
-
-                    feats = []
-                    for waveform in waveforms.numpy():
-                        feat = melspectrogram(
-                            x=waveform,
-                            sr=config.sr,
-                            n_mels=config.n_mels,
-                            window_size=config.window_size,
-                            hop_length=config.hop_size)
-                        feats.append(feat)
-
-                    feats = paddle.to_tensor(np.asarray(feats))
-                    feats = feature_normalize(
-                        feats, mean_norm=True, std_norm=False)
-                    logits = model(feats)
-
-                    preds = paddle.argmax(logits, axis=1)
-                    num_corrects += (preds == labels).numpy().sum()
+                    if use_feat_cache:
+                        feats, labels = batch['feats'], batch['labels']
+                        feats = feats.astype('float32')
+                    else:
+                        waveforms, labels = batch['waveforms'], batch['labels']
+                        feats = feature_extractor(waveforms)
+                    feats = normalize(feats)
+                    with paddle.amp.auto_cast(enable=use_amp, level=amp_level):
+                        logits = model(feats)
+
+                    corrects = paddle.equal(logits.argmax(axis=1), labels)
+                    num_corrects += corrects.astype('int32').sum(dtype='int64')
                     num_samples += feats.shape[0]
 
+            # we only sync the device corrects once after the evaluation
             print_msg = '[Evaluation result]'
-            print_msg += ' dev_acc={:.4f}'.format(num_corrects / num_samples)
+            print_msg += ' dev_acc={:.4f}'.format(num_corrects.item() /
+                                                  num_samples)
             logger.info(print_msg)
 
             # stage 9-14: Save model parameters
             save_dir = os.path.join(args.checkpoint_dir,
                                     'epoch_{}'.format(epoch))
             last_saved_epoch = os.path.join('epoch_{}'.format(epoch),
-                                            "model.pdparams")
+                                            model_file)
             logger.info('Saving model checkpoint to {}'.format(save_dir))
-            paddle.save(model.state_dict(),
-                        os.path.join(save_dir, 'model.pdparams'))
-            paddle.save(optimizer.state_dict(),
-                        os.path.join(save_dir, 'model.pdopt'))
+            checkpoint_saver.save(
+                {
+                    os.path.join(save_dir, model_file): model.state_dict(),
+                    os.path.join(save_dir, 'model.pdopt'):
+                    optimizer.state_dict(),
+                },
+                save_fns={os.path.join(save_dir, model_file): save_model_fn})
 
             if nranks > 1:
                 paddle.distributed.barrier()  # Main process
 
-    # stage 10: create the final trained model.pdparams with soft link
+    # stage 10: create the final trained model.pdparams or model.pdpacked with soft link
     if rank == 0:
-        final_model = os.path.join(args.checkpoint_dir, "model.pdparams")
+        checkpoint_saver.wait()
+        final_model = os.path.join(args.checkpoint_dir, model_file)
         logger.info(f"we will create the final model: {final_model}")
-        if os.path.islink(final_model):
-            logger.info(
-                f"An {final_model} already exists, we will rm is and create it again"
-            )
-            os.unlink(final_model)
+        # remove the final model of both formats,
+        # a stale one of the other format would be loaded in the test
+        for model_format in ["model.pdparams", "model.pdpacked"]:
+            stale_model = os.path.join(args.checkpoint_dir, model_format)
+            if os.path.islink(stale_model):
+                logger.info(
+                    f"An {stale_model} already exists, we will rm is and create it again"
+                )
+                os.unlink(stale_model)
         os.symlink(last_saved_epoch, final_model)
 
 
@@ -351,6 +453,11 @@ if __name__ == "__main__":
                         type=str,
                         default='./checkpoint',
                         help="Directory to save model checkpoints.")
+    parser.add_argument("--feat-dir",
+                        type=str,
+                        default=None,
+                        help="Directory of the train.h5 and dev.h5 feats precomputed by compute_feats.py, "
+                             "it only works when the augment is disabled.")
 
     args = parser.parse_args()
     # yapf: enable
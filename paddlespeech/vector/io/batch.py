@@ -34,14 +34,33 @@ def waveform_collate_fn(batch):
     return {'waveforms': waveforms, 'labels': labels}
 
 
+def feat_collate_fn(batch):
+    """Wrap the precomputed feats into a batch form
+
+    Args:
+        batch (list): the feat list from the dataloader
+                      the item of data include several field
+                      feat: the utterance feat data, such as fbank
+                      label: the utterance label encoding data
+
+    Returns:
+        dict: the batch data to dataloader
+    """
+    feats = np.stack([item['feat'] for item in batch])
+    labels = np.stack([item['label'] for item in batch])
+
+    return {'feats': feats, 'labels': labels}
+
+
 def feature_normalize(feats: paddle.Tensor,
                       mean_norm: bool=True,
                       std_norm: bool=True,
                       convert_to_numpy: bool=False):
-    """Do one utterance feature normalization
+    """Do utterance feature normalization along the time axis
 
     Args:
         feats (paddle.Tensor): the original utterance feat, such as fbank, mfcc
+                               with shape (n_mels, T) or batch shape (N, n_mels, T)
         mean_norm (bool, optional): mean norm flag. Defaults to True.
         std_norm (bool, optional): std norm flag. Defaults to True.
         convert_to_numpy (bool, optional): convert the paddle.tensor to numpy 
@@ -59,9 +78,13 @@ def feature_normalize(feats: paddle.Tensor,
         feats_np = (feats_np - mean) / std
         feats = paddle.to_tensor(feats_np, dtype=feats.dtype)
     else:
-        mean = feats.mean(axis=-1, keepdim=True) if mean_norm else 0
-        std = feats.std(axis=-1, keepdim=True) if std_norm else 1
-        feats = (feats - mean) / std
+        # the std is computed before the mean is removed, it is the same as numpy
+        # and we skip the no-op kernels if any norm is disabled
+        std = feats.std(axis=-1, keepdim=True) if std_norm else None
+        if mean_norm:
+            feats = feats - feats.mean(axis=-1, keepdim=True)
+        if std_norm:
+            feats = feats / std
 
     return feats
 
@@ -95,10 +118,13 @@ def batch_feature_normalize(batch, mean_norm: bool=True, std_norm: bool=True):
     """
     ids = [item['utt_id'] for item in batch]
     lengths = np.asarray([item['feat'].shape[1] for item in batch])
-    feats = list(
-        map(lambda x: pad_right_2d(x, lengths.max()),
-            [item['feat'] for item in batch]))
-    feats = np.stack(feats)
+    # we fill the feats into the preallocated zero padded batch buffer,
+    # instead of padding each feat and then stacking them, which copies the feats twice
+    feat = batch[0]['feat']
+    feats = np.zeros(
+        (len(batch), feat.shape[0], lengths.max()), dtype=feat.dtype)
+    for i, item in enumerate(batch):
+        feats[i, :, :lengths[i]] = item['feat']
 
     # Features normalization if needed
     for i in range(len(feats)):
@@ -14,6 +14,7 @@
 from dataclasses import dataclass
 from dataclasses import fields
 
+import h5py
 from paddle.io import Dataset
 from paddleaudio.backends import soundfile_load as load_audio
 from paddleaudio.compliance.librosa import melspectrogram
@@ -191,3 +192,50 @@ class CSVDataset(Dataset):
             int: the length num of the dataset
         """
         return len(self.data)
+
+
+class MelFeatDataset(CSVDataset):
+    def __init__(self,
+                 csv_path,
+                 feat_path,
+                 label2id_path=None,
+                 n_train_snts: int=-1):
+        """Implement the CSV Dataset with the precomputed melspectrogram feats,
+        the feats are computed by ecapa_tdnn/compute_feats.py 
+        and stored in the hdf5 file keyed by the utt_id
+
+        Args:
+            csv_path (str): csv dataset file path
+            feat_path (str): the precomputed feats hdf5 file path
+            label2id_path (str): the utterance label to integer id map file path
+            n_train_snts (int): select the n_train_snts sample from the dataset. 
+                                if n_train_snts = -1, dataset will load all the sample.
+                                Default value is -1.
+        """
+        super().__init__(
+            csv_path, label2id_path=label2id_path, n_train_snts=n_train_snts)
+        self.feat_path = feat_path
+        # the hdf5 file handle can not be shared by the dataloader worker process,
+        # so we open it in the process at the first time to read the feats
+        self.feat_file = None
+
+    def convert_to_record(self, idx: int):
+        """convert the dataset sample to training record with the precomputed feat
+
+        Args:
+            idx (int) : the request index in all the dataset
+        """
+        if self.feat_file is None:
+            self.feat_file = h5py.File(self.feat_path, 'r')
+
+        sample = self.data[idx]
+
+        record = {}
+        for field in fields(sample):
+            record[field.name] = getattr(sample, field.name)
+
+        record.update({'feat': self.feat_file[record['utt_id']][()]})
+        if self.label2id:
+            record.update({'label': self.label2id[record['label']]})
+
+        return record
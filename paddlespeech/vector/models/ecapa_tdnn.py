@@ -11,8 +11,6 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import math
-
 import paddle
 import paddle.nn as nn
 import paddle.nn.functional as F
@@ -24,14 +22,15 @@ def length_to_mask(length, max_len=None, dtype=None):
     if max_len is None:
         max_len = length.max().astype(
             'int').item()  # using arange to generate mask
+    # the mask is broadcasted to (N, max_len),
+    # which does not depend on the static batch size and max_len
     mask = paddle.arange(
-        max_len, dtype=length.dtype).expand(
-            (len(length), max_len)) < length.unsqueeze(1)
+        max_len, dtype=length.dtype).unsqueeze(0) < length.unsqueeze(1)
 
     if dtype is None:
         dtype = length.dtype
 
-    mask = paddle.to_tensor(mask, dtype=dtype)
+    mask = mask.astype(dtype)
     return mask
 
 
@@ -116,38 +115,34 @@ class Conv1d(nn.Layer):
         Returns:
             paddle.Tensor: the padded input data
         """
-        L_in = x.shape[-1]  # Detecting input shape
-        padding = self._get_padding_elem(L_in, stride, kernel_size,
+        # the same padding does not depend on the input time length,
+        # so it keeps a python int list under the static graph
+        padding = self._get_padding_elem(stride, kernel_size,
                                          dilation)  # Time padding
         x = F.pad(
             x, padding, mode=self.padding_mode,
             data_format="NCL")  # Applying padding
         return x
 
-    def _get_padding_elem(self,
-                          L_in: int,
-                          stride: int,
-                          kernel_size: int,
-                          dilation: int):
+    def _get_padding_elem(self, stride: int, kernel_size: int, dilation: int):
         """Calculate the padding value in same mode
 
         Args:
-            L_in (int): the times of the input data, 
             stride (int): 1-d convolution stride
             kernel_size (int): 1-d convolution kernel size
             dilation (int): 1-d convolution stride
 
         Returns:
-            int: return the padding value in same mode
+            list: return the left and right padding value in same mode
         """
         if stride > 1:
-            n_steps = math.ceil(((L_in - kernel_size * dilation) / stride) + 1)
-            L_out = stride * (n_steps - 1) + kernel_size * dilation
             padding = [kernel_size // 2, kernel_size // 2]
         else:
-            L_out = (L_in - dilation * (kernel_size - 1) - 1) // stride + 1
-
-            padding = [(L_in - L_out) // 2, (L_in - L_out) // 2]
+            # L_in - L_out = dilation * (kernel_size - 1) when the stride is 1
+            padding = [
+                dilation * (kernel_size - 1) // 2,
+                dilation * (kernel_size - 1) // 2
+            ]
 
         return padding
 
@@ -326,8 +321,8 @@ class AttentiveStatisticsPooling(nn.Layer):
         if self.global_context:
             total = mask.sum(axis=2, keepdim=True).astype('float32')
             mean, std = _compute_statistics(x, mask / total)
-            mean = mean.unsqueeze(2).tile((1, 1, L))
-            std = std.unsqueeze(2).tile((1, 1, L))
+            mean = mean.unsqueeze(2).expand_as(x)
+            std = std.unsqueeze(2).expand_as(x)
             attn = paddle.concat([x, mean, std], axis=1)
         else:
             attn = x
@@ -500,9 +495,10 @@ class EcapaTdnn(nn.Layer):
         """
         xl = []
         for layer in self.blocks:
-            try:
+            # only the SE-Res2Net layers use the lengths to mask the padding
+            if isinstance(layer, SERes2NetBlock):
                 x = layer(x, lengths=lengths)
-            except TypeError:
+            else:
                 x = layer(x)
             xl.append(x)
 
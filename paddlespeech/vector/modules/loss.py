@@ -61,13 +61,18 @@ class AdditiveAngularMargin(AngularMargin):
 
     def forward(self, outputs, targets):
         cosine = outputs.astype('float32')
-        sine = paddle.sqrt(1.0 - paddle.pow(cosine, 2))
-        phi = cosine * self.cos_m - sine * self.sin_m  # cos(theta + m)
+        # the margin is only added to the target class,
+        # so we compute cos(theta + m) on the target cosine with shape (N, 1)
+        # instead of all the classes cosine with shape (N, num_class)
+        target_cosine = (cosine * targets).sum(axis=1, keepdim=True)
+        sine = paddle.sqrt(1.0 - paddle.pow(target_cosine, 2))
+        phi = target_cosine * self.cos_m - sine * self.sin_m  # cos(theta + m)
         if self.easy_margin:
-            phi = paddle.where(cosine > 0, phi, cosine)
+            phi = paddle.where(target_cosine > 0, phi, target_cosine)
         else:
-            phi = paddle.where(cosine > self.th, phi, cosine - self.mm)
-        outputs = (targets * phi) + ((1.0 - targets) * cosine)
+            phi = paddle.where(target_cosine > self.th, phi,
+                               target_cosine - self.mm)
+        outputs = cosine + targets * (phi - target_cosine)
         return self.scale * outputs
 
 
@@ -80,17 +85,17 @@ class LogSoftmaxWrapper(nn.Layer):
         """
         super(LogSoftmaxWrapper, self).__init__()
         self.loss_fn = loss_fn
-        self.criterion = paddle.nn.KLDivLoss(reduction="sum")
 
     def forward(self, outputs, targets, length=None):
-        targets = F.one_hot(targets, outputs.shape[1])
+        one_hot_targets = F.one_hot(targets, outputs.shape[1])
         try:
-            predictions = self.loss_fn(outputs, targets)
+            predictions = self.loss_fn(outputs, one_hot_targets)
         except TypeError:
             predictions = self.loss_fn(outputs)
 
-        predictions = F.log_softmax(predictions, axis=1)
-        loss = self.criterion(predictions, targets) / targets.sum()
+        # the KLDivLoss between the log_softmax and the one-hot targets is the cross entropy,
+        # and the cross_entropy fuses the log_softmax and the nll loss into one kernel
+        loss = F.cross_entropy(predictions, targets, reduction='mean')
         return loss
 
 
@@ -0,0 +1,196 @@
+# Copyright (c) 2022 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import copy
+import json
+import os
+import struct
+import threading
+from typing import Callable
+from typing import Dict
+from typing import Optional
+
+import numpy as np
+import paddle
+
+from paddlespeech.s2t.utils.log import Log
+
+logger = Log(__name__).getlog()
+
+
+def snapshot_state_dict(state_dict: dict) -> dict:
+    """Copy the model or optimizer state dict to the host memory, 
+       the snapshot is not changed by the following training steps
+
+    Args:
+        state_dict (dict): the model or optimizer state dict
+
+    Returns:
+        dict: the state dict with numpy array values
+    """
+    snapshot = {}
+    for key, value in state_dict.items():
+        if isinstance(value, paddle.Tensor):
+            snapshot[key] = np.array(value)
+        elif isinstance(value, dict):
+            snapshot[key] = snapshot_state_dict(value)
+        else:
+            snapshot[key] = copy.deepcopy(value)
+    return snapshot
+
+
+# the packed checkpoint file layout:
+# 8 bytes little-endian header length, the json header {name: {offset, shape, dtype}},
+# and then all the arrays in one contiguous buffer, each array offset is aligned to _PACKED_ALIGN
+_PACKED_ALIGN = 64
+
+
+def _align(offset: int) -> int:
+    return (offset + _PACKED_ALIGN - 1) // _PACKED_ALIGN * _PACKED_ALIGN
+
+
+def save_packed_state_dict(state_dict: dict, path: str):
+    """Save the model state dict into one contiguous buffer file,
+       it only has one header and one sequential buffer write,
+       instead of the separate pickle entry of each parameter
+
+    Args:
+        state_dict (dict): the model state dict with paddle.Tensor or numpy array values
+        path (str): the packed checkpoint file path
+    """
+    arrays = {
+        name: np.ascontiguousarray(np.asarray(value))
+        for name, value in state_dict.items()
+    }
+    meta = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        meta[name] = {
+            "offset": offset,
+            "shape": list(array.shape),
+            "dtype": array.dtype.str
+        }
+        offset += array.nbytes
+
+    buffer = np.zeros(offset, dtype=np.uint8)
+    for name, array in arrays.items():
+        start = meta[name]["offset"]
+        buffer[start:start + array.nbytes] = array.reshape(-1).view(np.uint8)
+
+    header = json.dumps(meta).encode("utf-8")
+    header += b" " * (_align(len(header) + 8) - len(header) - 8)
+
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(buffer.data)
+
+
+def load_packed_state_dict(path: str) -> dict:
+    """Load the model state dict from the packed checkpoint file with memory map,
+       the arrays are read from the disk when they are set to the model
+
+    Args:
+        path (str): the packed checkpoint file path
+
+    Returns:
+        dict: the model state dict with read-only numpy array values
+    """
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        meta = json.loads(f.read(header_size).decode("utf-8"))
+
+    buffer = np.memmap(path, dtype=np.uint8, mode="r", offset=8 + header_size)
+    state_dict = {}
+    for name, info in meta.items():
+        dtype = np.dtype(info["dtype"])
+        shape = info["shape"]
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        start = info["offset"]
+        state_dict[name] = buffer[start:start + nbytes].view(dtype).reshape(
+            shape)
+    return state_dict
+
+
+def load_model_state_dict(checkpoint_dir: str) -> dict:
+    """Load the model state dict in the checkpoint directory,
+       the newer one is loaded if both model.pdpacked and model.pdparams exist,
+       so a stale checkpoint of the other format from an earlier run is skipped
+
+    Args:
+        checkpoint_dir (str): the checkpoint directory
+
+    Returns:
+        dict: the model state dict
+    """
+    packed_path = os.path.join(checkpoint_dir, "model.pdpacked")
+    params_path = os.path.join(checkpoint_dir, "model.pdparams")
+    if os.path.exists(packed_path) and (
+            not os.path.exists(params_path) or
+            os.path.getmtime(packed_path) > os.path.getmtime(params_path)):
+        return load_packed_state_dict(packed_path)
+    return paddle.load(params_path)
+
+
+class AsyncCheckpointSaver():
+    def __init__(self):
+        """Save the checkpoint in a background thread,
+           the state dict snapshot is done in the main thread before the weights are updated,
+           and the serialization and disk writing are hidden behind the training
+        """
+        self._thread = None
+        self._error = None
+
+    def save(self,
+             state_dicts: Dict[str, dict],
+             save_fns: Optional[Dict[str, Callable]]=None):
+        """Snapshot the state dicts and save them in the background thread
+
+        Args:
+            state_dicts (Dict[str, dict]): the save path to the model or optimizer state dict
+            save_fns (Dict[str, Callable], optional): the save path to the save function, 
+                                                     such as save_packed_state_dict. 
+                                                     Defaults to paddle.save.
+        """
+        # we keep the disk order of the checkpoints
+        self.wait()
+        snapshots = {
+            path: snapshot_state_dict(state_dict)
+            for path, state_dict in state_dicts.items()
+        }
+        self._thread = threading.Thread(
+            target=self._save, args=(snapshots, save_fns or {}))
+        self._thread.start()
+
+    def _save(self, snapshots: Dict[str, dict], save_fns: Dict[str,
+                                                                Callable]):
+        try:
+            for path, snapshot in snapshots.items():
+                save_fns.get(path, paddle.save)(snapshot, path)
+        except Exception as e:
+            self._error = e
+
+    def wait(self):
+        """Wait for the saving thread to finish, 
+           and raise the exception in the saving thread if it exists
+        """
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
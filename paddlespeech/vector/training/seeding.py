@@ -26,3 +26,17 @@ def seed_everything(seed: int):
     random.seed(seed)
     np.random.seed(seed)
     logger.info(f"Set the seed of paddle, random, np.random to {seed}.")
+
+
+def worker_init_fn(worker_id: int):
+    """Seed np.random in each dataloader worker process.
+
+    The paddle dataloader gives all the workers the same base seed in the
+    worker info, so the worker id is added to keep the np.random streams
+    of the workers distinct and reproducible across the epochs.
+
+    Args:
+        worker_id (int): the dataloader worker process id
+    """
+    worker_info = paddle.io.get_worker_info()
+    np.random.seed((worker_info.seed + worker_id) % 2**32)
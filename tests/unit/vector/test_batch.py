@@ -0,0 +1,54 @@
+# Copyright (c) 2022 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import paddle
+
+
+def test_feature_normalize(device):
+    paddle.device.set_device(device)
+    from paddlespeech.vector.io.batch import feature_normalize
+
+    feats = paddle.rand([4, 80, 300], dtype="float32")
+
+    # the batch feats mean normalization equals to the numpy normalization
+    feats_norm = feature_normalize(feats, mean_norm=True, std_norm=False)
+    feats_norm_np = feature_normalize(
+        feats, mean_norm=True, std_norm=False, convert_to_numpy=True)
+    assert feats_norm.shape == feats.shape
+    assert feats_norm.allclose(feats_norm_np, atol=1e-5)
+    assert feats_norm.mean(axis=-1).abs().max() < 1e-5
+
+    # Edge cases
+    no_norm = feature_normalize(feats, mean_norm=False, std_norm=False)
+    assert no_norm.allclose(feats)
+
+
+def test_batch_feature_normalize():
+    import numpy as np
+    from paddlespeech.vector.io.batch import batch_feature_normalize
+
+    batch = [{
+        'utt_id': f'utt_{i}',
+        'feat': np.random.rand(80, length).astype("float32")
+    } for i, length in enumerate([300, 200, 100])]
+    outputs = batch_feature_normalize(batch, mean_norm=True, std_norm=False)
+
+    assert outputs['ids'] == ['utt_0', 'utt_1', 'utt_2']
+    assert outputs['feats'].shape == (3, 80, 300)
+    assert outputs['feats'].dtype == np.float32
+    assert np.allclose(outputs['lengths'], [1.0, 2 / 3, 1 / 3])
+    for i, item in enumerate(batch):
+        length = item['feat'].shape[1]
+        feat = item['feat'] - item['feat'].mean(axis=-1, keepdims=True)
+        assert np.allclose(outputs['feats'][i, :, :length], feat, atol=1e-6)
+        assert outputs['feats'][i, :, length:].sum() == 0
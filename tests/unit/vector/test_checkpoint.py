@@ -0,0 +1,62 @@
+# Copyright (c) 2022 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+
+import numpy as np
+import paddle
+
+
+def test_async_checkpoint_saver(tmpdir, device):
+    paddle.device.set_device(device)
+    from paddlespeech.vector.training.checkpoint import AsyncCheckpointSaver
+
+    model = paddle.nn.Linear(4, 2)
+    expected = {k: v.numpy() for k, v in model.state_dict().items()}
+    path = os.path.join(str(tmpdir), "epoch_1", "model.pdparams")
+
+    saver = AsyncCheckpointSaver()
+    saver.save({path: model.state_dict()})
+    # the weights updated after the snapshot do not change the checkpoint
+    for param in model.parameters():
+        param.set_value(paddle.zeros_like(param))
+    saver.wait()
+
+    state_dict = paddle.load(path)
+    assert state_dict.keys() == expected.keys()
+    for key, value in expected.items():
+        assert np.allclose(np.array(state_dict[key]), value)
+
+
+def test_packed_state_dict(tmpdir, device):
+    paddle.device.set_device(device)
+    from paddlespeech.vector.training.checkpoint import load_model_state_dict
+    from paddlespeech.vector.training.checkpoint import save_packed_state_dict
+
+    model = paddle.nn.Sequential(
+        paddle.nn.Conv1D(3, 5, 3), paddle.nn.BatchNorm1D(5))
+    path = os.path.join(str(tmpdir), "model.pdpacked")
+    save_packed_state_dict(model.state_dict(), path)
+
+    state_dict = load_model_state_dict(str(tmpdir))
+    assert state_dict.keys() == model.state_dict().keys()
+    for key, value in model.state_dict().items():
+        assert state_dict[key].dtype == value.numpy().dtype
+        assert np.array_equal(state_dict[key], value.numpy())
+
+    # the packed state dict can be set to the model directly
+    new_model = paddle.nn.Sequential(
+        paddle.nn.Conv1D(3, 5, 3), paddle.nn.BatchNorm1D(5))
+    new_model.set_state_dict(state_dict)
+    for key, value in new_model.state_dict().items():
+        assert np.array_equal(value.numpy(), state_dict[key])
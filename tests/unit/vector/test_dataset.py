@@ -0,0 +1,64 @@
+# Copyright (c) 2022 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+
+import h5py
+import numpy as np
+
+
+def test_mel_feat_dataset(tmpdir):
+    from paddlespeech.vector.io.batch import feat_collate_fn
+    from paddlespeech.vector.io.dataset import MelFeatDataset
+
+    csv_path = os.path.join(str(tmpdir), "train.csv")
+    label2id_path = os.path.join(str(tmpdir), "spk_id2label.txt")
+    feat_path = os.path.join(str(tmpdir), "train.h5")
+
+    utts = [("id10001_1", "id10001"), ("id10002_1", "id10002"),
+            ("id10001_2", "id10001")]
+    with open(csv_path, 'w') as f:
+        f.write("utt_id,duration,wav,start,stop,spk_id\n")
+        for utt_id, spk_id in utts:
+            f.write(f"{utt_id},3.0,{utt_id}.wav,0,48000,{spk_id}\n")
+    with open(label2id_path, 'w') as f:
+        f.write("id10001 0\nid10002 1\n")
+
+    # the feats are stored in float16 by compute_feats.py
+    feats = {
+        utt_id: np.random.rand(80, 301).astype("float16")
+        for utt_id, _ in utts
+    }
+    with h5py.File(feat_path, 'w') as feat_file:
+        for utt_id, feat in feats.items():
+            feat_file.create_dataset(utt_id, data=feat)
+
+    dataset = MelFeatDataset(
+        csv_path=csv_path, feat_path=feat_path, label2id_path=label2id_path)
+    # the hdf5 file is opened at the first read
+    assert dataset.feat_file is None
+    assert len(dataset) == len(utts)
+
+    batch = [dataset[idx] for idx in range(len(dataset))]
+    assert dataset.feat_file is not None
+    for record, (utt_id, _) in zip(batch, utts):
+        assert record['utt_id'] == utt_id
+        assert record['feat'].dtype == np.float16
+        assert np.array_equal(record['feat'], feats[utt_id])
+    assert [record['label'] for record in batch] == [0, 1, 0]
+
+    outputs = feat_collate_fn(batch)
+    assert outputs['feats'].shape == (3, 80, 301)
+    assert outputs['feats'].dtype == np.float16
+    assert np.array_equal(outputs['feats'][1], feats["id10002_1"])
+    assert outputs['labels'].tolist() == [0, 1, 0]
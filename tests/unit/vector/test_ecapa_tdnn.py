@@ -0,0 +1,61 @@
+# Copyright (c) 2022 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import inspect
+
+import numpy as np
+import paddle
+
+
+def test_ecapa_tdnn_to_static(device):
+    paddle.device.set_device(device)
+    from paddlespeech.vector.models.ecapa_tdnn import EcapaTdnn
+    from paddlespeech.vector.modules.sid_model import SpeakerIdetification
+
+    n_mels, num_class = 80, 10
+    # the default sot mode and the ast mode if the paddle supports both
+    static_kwargs = [{}]
+    if "full_graph" in inspect.signature(paddle.jit.to_static).parameters:
+        static_kwargs.append({"full_graph": True})
+
+    for kwargs in static_kwargs:
+        ecapa_tdnn = EcapaTdnn(
+            input_size=n_mels,
+            lin_neurons=8,
+            channels=[16, 16, 16, 16, 48],
+            attention_channels=8,
+            res2net_scale=4,
+            se_channels=8)
+        model = SpeakerIdetification(
+            backbone=ecapa_tdnn, num_class=num_class, lin_neurons=8)
+        model.eval()
+
+        feats = [
+            paddle.randn([2, n_mels, 100]), paddle.randn([3, n_mels, 150])
+        ]
+        with paddle.no_grad():
+            expected = [model(x).numpy() for x in feats]
+
+        model = paddle.jit.to_static(
+            model,
+            input_spec=[
+                paddle.static.InputSpec(
+                    shape=[None, n_mels, None], dtype='float32')
+            ],
+            **kwargs)
+        # the converted forward works on the different batch size and times
+        with paddle.no_grad():
+            for x, y in zip(feats, expected):
+                logits = model(x)
+                assert logits.shape == [x.shape[0], num_class]
+                assert np.allclose(logits.numpy(), y, atol=1e-5)
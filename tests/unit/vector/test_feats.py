@@ -0,0 +1,44 @@
+# Copyright (c) 2022 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import numpy as np
+import paddle
+
+
+def test_log_melspectrogram_align_with_librosa(device):
+    paddle.device.set_device(device)
+    from paddleaudio.compliance.librosa import melspectrogram
+    from paddleaudio.features import LogMelSpectrogram
+
+    # the voxceleb sv0 config
+    sr, window_size, hop_size, n_mels = 16000, 400, 160, 80
+    waveform = np.random.uniform(-1, 1, size=(sr * 2, )).astype("float32")
+
+    # the training feats are computed on device by the LogMelSpectrogram layer,
+    # and the test feats are computed by the numpy melspectrogram in CSVDataset
+    feature_extractor = LogMelSpectrogram(
+        sr=sr,
+        n_fft=window_size,
+        hop_length=hop_size,
+        win_length=window_size,
+        n_mels=n_mels)
+    feat = feature_extractor(paddle.to_tensor(waveform).unsqueeze(0))[0]
+    feat_np = melspectrogram(
+        waveform,
+        sr=sr,
+        n_mels=n_mels,
+        window_size=window_size,
+        hop_length=hop_size)
+
+    assert feat.shape == list(feat_np.shape)
+    assert np.allclose(feat.numpy(), feat_np, rtol=1e-4, atol=1e-3)
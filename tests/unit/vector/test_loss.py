@@ -0,0 +1,44 @@
+# Copyright (c) 2022 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import math
+
+import paddle
+import paddle.nn.functional as F
+
+
+def test_additive_angular_margin_softmax(device):
+    paddle.device.set_device(device)
+    from paddlespeech.vector.modules.loss import AdditiveAngularMargin
+    from paddlespeech.vector.modules.loss import LogSoftmaxWrapper
+
+    margin, scale = 0.2, 30
+    cosine = paddle.uniform([8, 100], min=-1.0, max=1.0)
+    labels = paddle.randint(0, 100, [8], dtype="int64")
+    criterion = LogSoftmaxWrapper(
+        loss_fn=AdditiveAngularMargin(margin=margin, scale=scale))
+    loss = criterion(cosine, labels)
+
+    # the reference aam softmax, the margin is computed on all the classes
+    # and the loss is the KLDivLoss between the log_softmax and the one-hot targets
+    targets = F.one_hot(labels, cosine.shape[1])
+    sine = paddle.sqrt(1.0 - paddle.pow(cosine, 2))
+    phi = cosine * math.cos(margin) - sine * math.sin(margin)
+    phi = paddle.where(cosine > math.cos(math.pi - margin), phi,
+                       cosine - math.sin(math.pi - margin) * margin)
+    predictions = scale * (targets * phi + (1.0 - targets) * cosine)
+    predictions = F.log_softmax(predictions, axis=1)
+    expected = paddle.nn.KLDivLoss(reduction="sum")(
+        predictions, targets) / targets.sum()
+
+    assert loss.allclose(expected.reshape(loss.shape), rtol=1e-5, atol=1e-5)